@@ -111,6 +111,27 @@ class annotatable_weakref(ref):
     """A weakref.ref that supports custom instance attributes."""
 
 
+class instance_doc(object):
+    """A class docstring that instances without a ``__dict__`` may override.
+
+    Read from the class, returns *doc*.  Read from an instance, returns
+    the instance's ``_doc`` slot if it is set and true, else *doc*.
+    Assigning ``__doc__`` on an instance stores the value in ``_doc``.
+
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self.doc
+        return getattr(obj, '_doc', None) or self.doc
+
+    def __set__(self, obj, value):
+        obj._doc = value
+
+
 # 由于weakref库是c实现的，看不到源码，所以只能查查用法了
 # weakred.ref 不能用于int， str 等不可变的对象
 # 返回 一个弱引用
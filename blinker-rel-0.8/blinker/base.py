@@ -8,12 +8,14 @@ each manages its own receivers and message emission.
 The :func:`signal` function provides singleton behavior for named signals.
 
 """
+from functools import partial
 from weakref import WeakValueDictionary
 
 from blinker._utilities import (
     WeakTypes,
     defaultdict,
     hashable_identity,
+    instance_doc,
     reference,
     symbol,
     )
@@ -22,20 +24,38 @@ from blinker._utilities import (
 ANY = symbol('ANY')
 ANY_ID = 0
 
+_EMPTY = frozenset()
+
+#: True while :data:`receiver_connected` has receivers; checked by
+#: :meth:`Signal.connect` before broadcasting.
+_receiver_connected_active = False
+
 
 class Signal(object):
-    """A generic notification emitter."""
+    __doc__ = instance_doc("""A generic notification emitter.""")
+
+    __slots__ = ('receivers', '_by_sender', '_weak_senders',
+                 '_receiver_cache', '_generation', '_specific_count',
+                 '_sealed', '_doc', '__weakref__')
 
     #: A convenience for importers, allows Signal.ANY
     ANY = ANY
 
     def __init__(self, doc=None):
         if doc:
-            self.__doc__ = doc
+            try:
+                self.__doc__ = doc
+            except AttributeError:
+                # a slotted subclass without its own instance_doc has a
+                # read-only __doc__; keep the doc in the inherited slot.
+                self._doc = doc
         self.receivers = {}
-        self._by_receiver = defaultdict(set)
         self._by_sender = defaultdict(set)
         self._weak_senders = {}
+        self._receiver_cache = {}
+        self._generation = 0
+        self._specific_count = 0
+        self._sealed = False
 
     def connect(self, receiver, sender=ANY, weak=True):
         """Connect *receiver* to signal events send by *sender*.
@@ -54,11 +74,16 @@ class Signal(object):
           and automatically disconnect when *receiver* goes out of scope or
           is garbage collected.  Defaults to True.
 
+        Raises :exc:`RuntimeError` if the signal has been :meth:`sealed
+        <seal>`.
+
         """
+        if self._sealed:
+            raise RuntimeError('cannot connect to a sealed signal')
         receiver_id = hashable_identity(receiver)
         if weak:
-            receiver_ref = reference(receiver, self._cleanup_receiver)
-            receiver_ref.receiver_id = receiver_id
+            receiver_ref = reference(
+                receiver, partial(self._cleanup_receiver, receiver_id))
         else:
             receiver_ref = receiver
         if sender is ANY:
@@ -70,31 +95,34 @@ class Signal(object):
         #                          2. 选项为false时，直接赋值为原值就好了
         # receiver的引用保存在 receivers dict 中，通过receiver_id进行查询
 
-        self.receivers.setdefault(receiver_id, receiver_ref)
+        self._receiver_cache.clear()
+        if weak:
+            self.receivers.setdefault(receiver_id, receiver_ref)
+        else:
+            # a strong reference always wins; a weak one never replaces it
+            self.receivers[receiver_id] = receiver_ref
         # _by_sender 字典用来保存对应于每个sender的receiver 订阅者
-        # _by_receiver 字典相反，用来保存对于每个 receiver 订阅者的 sender
-        self._by_sender[sender_id].add(receiver_id)
-        self._by_receiver[receiver_id].add(sender_id)
-        # todo 这个del 很奇怪，每次函数结束receiver_ref是会被自动删除的才对，为什么要自行del
-        del receiver_ref
+        bucket = self._by_sender[sender_id]
+        if not bucket and sender_id != ANY_ID:
+            self._specific_count += 1
+        bucket.add(receiver_id)
 
         if sender is not ANY and sender_id not in self._weak_senders:
             # wire together a cleanup for weakref-able senders
             try:
-                sender_ref = reference(sender, self._cleanup_sender)
-                sender_ref.sender_id = sender_id
+                sender_ref = reference(
+                    sender, partial(self._cleanup_sender, sender_id))
             except TypeError:
                 pass
             # 第一次碰到 try-except中的else。这个else对应于 没有exception抛出的情况 要执行的内容
             else:
-                self._weak_senders.setdefault(sender_id, sender_ref)
-                del sender_ref
+                self._weak_senders[sender_id] = sender_ref
 
         # broadcast this connection.  if receivers raise, disconnect.
         # todo receiver_connected 的作用？
         # 每次对任意一个Signal（当然receriver_connected Signal除外）,
         #  都会触发receiver_connected信号，我们可以对receiver_connected 信号进行订阅，做一些有用的事情，比如记录每次信号触发的信息
-        if receiver_connected.receivers and self is not receiver_connected:
+        if _receiver_connected_active and self is not receiver_connected:
             # 判断 self is not receiver_connected 十分重要，不然会引起死循环
             try:
                 receiver_connected.send(self,   # sender 是Signal自己
@@ -129,11 +157,138 @@ class Signal(object):
                             '%s given' % len(sender))
         else:
             sender = sender[0]
-        if not self.receivers:
+        receivers = self.receivers
+        if not receivers:
             return []
+        # without sender-specific receivers every sender maps to ANY, so
+        # skip computing the sender's identity.
+        if self._specific_count:
+            sender_id = hashable_identity(sender)
+        else:
+            sender_id = ANY_ID
+        entries = self._receiver_cache.get(sender_id)
+        if entries is None:
+            entries = self._cached_receivers(sender_id)
+        strong, weak = entries[0], entries[1]
+        generation = self._generation
+        result = []
+        append = result.append
+        for receiver in strong:
+            # skip receivers disconnected earlier in this dispatch
+            if (self._generation != generation and
+                    hashable_identity(receiver) not in receivers):
+                continue
+            append((receiver, receiver(sender, **kwargs)))
+        for receiver_ref in weak:
+            receiver = receiver_ref()
+            if receiver is None:
+                continue
+            if (self._generation != generation and
+                    hashable_identity(receiver) not in receivers):
+                continue
+            append((receiver, receiver(sender, **kwargs)))
+        return result
+
+    def send_data(self, sender=None, data=None):
+        """Emit this signal on behalf of *sender*, passing on the dict *data*.
+
+        Like :meth:`send`, but the keyword arguments arrive as a dict the
+        caller owns instead of being repacked from \*\*kwargs.  Receivers
+        whose ``_blinker_fast`` attribute is ``True`` are called as
+        ``receiver(sender, data)`` and share *data* without a copy; they
+        must not modify it.  All other receivers are called as
+        ``receiver(sender, **data)``.
+
+        """
+        receivers = self.receivers
+        if not receivers:
+            return []
+        if data is None:
+            data = {}
+        if self._specific_count:
+            sender_id = hashable_identity(sender)
         else:
-            return [(receiver, receiver(sender, **kwargs))
-                    for receiver in self.receivers_for(sender)]
+            sender_id = ANY_ID
+        entries = self._receiver_cache.get(sender_id)
+        if entries is None:
+            entries = self._cached_receivers(sender_id)
+        split = entries[2]
+        if split is None:
+            split = entries[2] = self._split_fast(entries[0], entries[1])
+        plain_strong, fast_strong, plain_weak, fast_weak = split
+        generation = self._generation
+        result = []
+        append = result.append
+        for receiver in plain_strong:
+            # skip receivers disconnected earlier in this dispatch
+            if (self._generation != generation and
+                    hashable_identity(receiver) not in receivers):
+                continue
+            append((receiver, receiver(sender, **data)))
+        for receiver in fast_strong:
+            if (self._generation != generation and
+                    hashable_identity(receiver) not in receivers):
+                continue
+            append((receiver, receiver(sender, data)))
+        for receiver_ref in plain_weak:
+            receiver = receiver_ref()
+            if receiver is None:
+                continue
+            if (self._generation != generation and
+                    hashable_identity(receiver) not in receivers):
+                continue
+            append((receiver, receiver(sender, **data)))
+        for receiver_ref in fast_weak:
+            receiver = receiver_ref()
+            if receiver is None:
+                continue
+            if (self._generation != generation and
+                    hashable_identity(receiver) not in receivers):
+                continue
+            append((receiver, receiver(sender, data)))
+        return result
+
+    def send_nocollect(self, *sender, **kwargs):
+        """Emit this signal on behalf of *sender*, discarding return values.
+
+        Behaves like :meth:`send` but builds no result list, for signals
+        emitted often by callers that ignore what receivers return.
+        Always returns ``None``.
+
+        """
+        if len(sender) == 0:
+            sender = None
+        elif len(sender) > 1:
+            raise TypeError('send_nocollect() accepts only one positional '
+                            'argument, %s given' % len(sender))
+        else:
+            sender = sender[0]
+        receivers = self.receivers
+        if not receivers:
+            return
+        if self._specific_count:
+            sender_id = hashable_identity(sender)
+        else:
+            sender_id = ANY_ID
+        entries = self._receiver_cache.get(sender_id)
+        if entries is None:
+            entries = self._cached_receivers(sender_id)
+        strong, weak = entries[0], entries[1]
+        generation = self._generation
+        for receiver in strong:
+            # skip receivers disconnected earlier in this dispatch
+            if (self._generation != generation and
+                    hashable_identity(receiver) not in receivers):
+                continue
+            receiver(sender, **kwargs)
+        for receiver_ref in weak:
+            receiver = receiver_ref()
+            if receiver is None:
+                continue
+            if (self._generation != generation and
+                    hashable_identity(receiver) not in receivers):
+                continue
+            receiver(sender, **kwargs)
 
     def has_receivers_for(self, sender):
         """True if there is probably a receiver for *sender*.
@@ -145,7 +300,7 @@ class Signal(object):
         """
         if not self.receivers:
             return False
-        if self._by_sender[ANY_ID]:
+        if self._by_sender.get(ANY_ID):
             return True
         if sender is ANY:
             return False
@@ -155,31 +310,120 @@ class Signal(object):
     def receivers_for(self, sender):
         """Iterate all live receivers listening for *sender*."""
         # TODO: test receivers_for(ANY)
+        return self._receivers_for_id(hashable_identity(sender))
+
+    def _receivers_for_id(self, sender_id):
+        """Iterate all live receivers listening for the sender *sender_id*."""
         if self.receivers:
-            sender_id = hashable_identity(sender)
-            if sender_id in self._by_sender:
-                ids = (self._by_sender[ANY_ID] |    # _by_sender 映射 senderid -> receiverids
-                       self._by_sender[sender_id])  # question : 这里对两个 id set做或操作意图是？
-                                                    # 每个sender 应该对应的 receivers 不应该只是明确订阅是自己的 receiver
-                                                    # 还应该包括 对应 ANY 的receivers，所以这里对 set 做了 或操作
-                                                    # ps: {1,2,3} | {2,3,4} == {1,2,3,4}
-            else:  # 对应 sender_id 不存在 _by_sender 中的情况。这种情况 可能 对应用户自己输错 sender todo
-                ids = self._by_sender[ANY_ID].copy()
-            for receiver_id in ids:
-                receiver = self.receivers.get(receiver_id)
+            entries = self._cached_receivers(sender_id)
+            strong, weak = entries[0], entries[1]
+            generation = self._generation
+            for receiver in strong:
+                # a receiver called earlier in this dispatch may have
+                # disconnected this one; recheck once anything was removed.
+                if (self._generation != generation and
+                        hashable_identity(receiver) not in self.receivers):
+                    continue
+                yield receiver
+            for receiver_ref in weak:
+                receiver = receiver_ref()
                 if receiver is None:
                     continue
-                if isinstance(receiver, WeakTypes):
-                    strong = receiver()
-                    if strong is None:
-                        self._disconnect(receiver_id, ANY_ID)
-                        continue
-                    receiver = strong
+                if (self._generation != generation and
+                        hashable_identity(receiver) not in self.receivers):
+                    continue
                 yield receiver
                 # 返回的是 正常的 强引用 类型
 
+    # ANY_ID and WeakTypes are bound as keyword defaults so the loop
+    # below, which runs once per receiver, does not look up globals.
+    def _cached_receivers(self, sender_id, _ANY_ID=ANY_ID,
+                          _WeakTypes=WeakTypes):
+        """Return the ``[strong, weak, split]`` cache entry for *sender_id*.
+
+        *strong* holds strongly connected receivers, ready to be called.
+        *weak* holds the references of weak receivers that were alive when
+        the tuples were built; dead ones are disconnected first.  Both are
+        built from :attr:`receivers` on first use and kept until the next
+        change in connections.  A weak receiver's cleanup callback is such
+        a change, so callers only need to skip a reference that died
+        during dispatch.  Every disconnect bumps ``_generation``, so a
+        caller that sees it change mid-dispatch must recheck each
+        receiver against :attr:`receivers`.  *split* starts out as
+        ``None`` and is filled in by :meth:`send_data` on first use.
+
+        """
+        cache = self._receiver_cache
+        entries = cache.get(sender_id)
+        if entries is not None:
+            return entries
+        if sender_id in self._by_sender:
+            # 每个sender 对应的 receivers 不只是明确订阅自己的 receiver，
+            # 还包括对应 ANY 的receivers，所以这里对 set 做了 或操作
+            ids = (self._by_sender.get(_ANY_ID, _EMPTY) |
+                   self._by_sender[sender_id])
+        else:
+            # senders nobody listens to specifically share the ANY entry,
+            # so the cache does not grow with every new sender.
+            sender_id = _ANY_ID
+            entries = cache.get(_ANY_ID)
+            if entries is not None:
+                return entries
+            ids = self._by_sender.get(_ANY_ID, _EMPTY)
+        strong, weak, dead = [], [], []
+        receivers = self.receivers
+        for receiver_id in ids:
+            receiver = receivers.get(receiver_id)
+            if receiver is None:
+                continue
+            if isinstance(receiver, _WeakTypes):
+                if receiver() is None:
+                    dead.append(receiver_id)
+                else:
+                    weak.append(receiver)
+            else:
+                strong.append(receiver)
+        for receiver_id in dead:
+            self._disconnect(receiver_id, _ANY_ID)
+        entries = cache[sender_id] = [tuple(strong), tuple(weak), None]
+        return entries
+
+    def _split_fast(self, strong, weak):
+        """Split cached receivers by their ``_blinker_fast`` attribute.
+
+        Returns ``(plain_strong, fast_strong, plain_weak, fast_weak)``,
+        stored by :meth:`send_data` in the third slot of a cache entry.
+        Only an attribute that is exactly ``True`` marks a receiver as
+        fast, so objects answering any attribute lookup, such as mocks,
+        keep the ``**data`` convention.
+
+        """
+        plain_strong, fast_strong, plain_weak, fast_weak = [], [], [], []
+        for receiver in strong:
+            if getattr(receiver, '_blinker_fast', False) is True:
+                fast_strong.append(receiver)
+            else:
+                plain_strong.append(receiver)
+        for receiver_ref in weak:
+            receiver = receiver_ref()
+            if receiver is None:
+                continue
+            if getattr(receiver, '_blinker_fast', False) is True:
+                fast_weak.append(receiver_ref)
+            else:
+                plain_weak.append(receiver_ref)
+        return (tuple(plain_strong), tuple(fast_strong),
+                tuple(plain_weak), tuple(fast_weak))
+
     def disconnect(self, receiver, sender=ANY):
-        """Disconnect *receiver* from this signal's events."""
+        """Disconnect *receiver* from this signal's events.
+
+        Raises :exc:`RuntimeError` if the signal has been :meth:`sealed
+        <seal>`.
+
+        """
+        if self._sealed:
+            raise RuntimeError('cannot disconnect from a sealed signal')
         if sender is ANY:
             sender_id = ANY_ID
         else:
@@ -188,40 +432,95 @@ class Signal(object):
         self._disconnect(receiver_id, sender_id)
 
     def _disconnect(self, receiver_id, sender_id):
+        self._receiver_cache.clear()
+        self._generation += 1
         if sender_id == ANY_ID:
-            if self._by_receiver.pop(receiver_id, False):
-                for bucket in self._by_sender.values():
+            if self.receivers.pop(receiver_id, None) is not None:
+                for sender_id, bucket in self._by_sender.items():
                     # 当 sender_id 为 ANY_ID 时，有必要检查每个 sender 对应的 receivers，并从 receivers 中尝试删去 receiver_id
-                    bucket.discard(receiver_id)
-            self.receivers.pop(receiver_id, None)
+                    if receiver_id in bucket:
+                        bucket.remove(receiver_id)
+                        if not bucket and sender_id != ANY_ID:
+                            self._specific_count -= 1
         else:
-            self._by_sender[sender_id].discard(receiver_id)
+            bucket = self._by_sender.get(sender_id)
+            if bucket and receiver_id in bucket:
+                bucket.remove(receiver_id)
+                if not bucket:
+                    self._specific_count -= 1
 
-    def _cleanup_receiver(self, receiver_ref):
+    def _cleanup_receiver(self, receiver_id, receiver_ref):
         """Disconnect a receiver from all senders."""
-        self._disconnect(receiver_ref.receiver_id, ANY_ID)
+        self._disconnect(receiver_id, ANY_ID)
 
-    def _cleanup_sender(self, sender_ref):
+    def _cleanup_sender(self, sender_id, sender_ref):
         """Disconnect all receivers from a sender."""
-        sender_id = sender_ref.sender_id
         assert sender_id != ANY_ID
         self._weak_senders.pop(sender_id, None)
-        for receiver_id in self._by_sender.pop(sender_id, ()):
-            self._by_receiver[receiver_id].discard(sender_id)
+        self._receiver_cache.clear()
+        if self._by_sender.pop(sender_id, None):
+            self._specific_count -= 1
+
+    def seal(self):
+        """Freeze the current connections for fast repeated emission.
+
+        Builds the receiver lookup for every known sender up front.
+        Afterwards :meth:`connect` and :meth:`disconnect` raise
+        :exc:`RuntimeError`.  Weakly referenced receivers and senders are
+        still cleaned up when they are garbage collected.
+
+        """
+        for sender_id in list(self._by_sender):
+            self._cached_receivers(sender_id)
+        self._cached_receivers(ANY_ID)
+        self._sealed = True
 
     def _clear_state(self):
         """Throw away all signal state.  Useful for unit tests."""
+        self._sealed = False
+        self._specific_count = 0
         self._weak_senders.clear()
+        self._receiver_cache.clear()
+        self._generation += 1
         self.receivers.clear()
         self._by_sender.clear()
-        self._by_receiver.clear()
 
 
-receiver_connected = Signal()
+class _ReceiverConnectedSignal(Signal):
+    """The :data:`receiver_connected` signal.
+
+    Keeps ``_receiver_connected_active`` in step with its receivers so
+    that every other signal's :meth:`~Signal.connect` can skip the
+    broadcast with a single global lookup.
+
+    """
+
+    __slots__ = ()
+
+    def connect(self, receiver, sender=ANY, weak=True):
+        global _receiver_connected_active
+        receiver = Signal.connect(self, receiver, sender, weak)
+        _receiver_connected_active = True
+        return receiver
+
+    def _disconnect(self, receiver_id, sender_id):
+        global _receiver_connected_active
+        Signal._disconnect(self, receiver_id, sender_id)
+        _receiver_connected_active = bool(self.receivers)
+
+    def _clear_state(self):
+        global _receiver_connected_active
+        Signal._clear_state(self)
+        _receiver_connected_active = False
+
+
+receiver_connected = _ReceiverConnectedSignal()
 
 
 class NamedSignal(Signal):
-    """A named generic notification emitter."""
+    __doc__ = instance_doc("""A named generic notification emitter.""")
+
+    __slots__ = ('name',)
 
     def __init__(self, name, doc=None):
         Signal.__init__(self, doc)
@@ -236,10 +535,16 @@ class Namespace(WeakValueDictionary):
 
     def signal(self, name, doc=None):
         """Return the :class:`NamedSignal` *name*, creating it if required."""
-        try:
-            return self[name]
-        except KeyError:
-            return self.setdefault(name, NamedSignal(name, doc))
+        # read the underlying dict of weak references directly; the
+        # mapping's own get() adds a Python-level call per lookup.
+        ref = self.data.get(name)
+        if ref is not None:
+            rv = ref()
+            if rv is not None:
+                return rv
+        rv = NamedSignal(name, doc)
+        self[name] = rv
+        return rv
 
 
 signal = Namespace().signal
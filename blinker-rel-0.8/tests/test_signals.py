@@ -1,4 +1,7 @@
+import gc
+
 import blinker
+from blinker._utilities import instance_doc
 from nose.tools import assert_raises
 
 
@@ -37,12 +40,26 @@ def test_meta_connect_failure():
 
     assert_raises(TypeError, sig.connect, receiver)
     assert not sig.receivers
-    assert not sig._by_receiver
     assert sig._by_sender == {blinker.base.ANY_ID: set()}
 
     blinker.receiver_connected._clear_state()
 
 
+def test_meta_connect_weak_cleanup():
+    sentinel = []
+    def meta_received(sender, **kw):
+        sentinel.append(sender)
+
+    blinker.receiver_connected.connect(meta_received)
+    del meta_received
+    assert not blinker.receiver_connected.receivers
+
+    sig = blinker.Signal()
+    sig.connect(lambda sender: None, weak=False)
+    assert not sentinel
+    assert not blinker.base._receiver_connected_active
+
+
 def test_singletons():
     ns = blinker.Namespace()
     assert not ns
@@ -54,6 +71,10 @@ def test_singletons():
     assert 'def' not in ns
     del s1
     assert 'abc' not in ns
+    s2 = ns.signal('abc', doc='x')
+    assert s2 is ns.signal('abc')
+    assert s2.__doc__ == 'x'
+    assert list(ns.keys()) == ['abc']
 
 
 def test_weak_receiver():
@@ -69,7 +90,6 @@ def test_weak_receiver():
     sig.send()
     assert not sentinel
     assert not sig.receivers
-    values_are_empty_sets_(sig._by_receiver)
     values_are_empty_sets_(sig._by_sender)
 
 
@@ -89,6 +109,36 @@ def test_strong_receiver():
     assert [id(fn) for fn in sig.receivers.values()] == [fn_id]
 
 
+def test_reconnect_keeps_strong_reference():
+    sentinel = []
+
+    # weak, then strong: the strong reference replaces the weak one
+    def received(sender):
+        sentinel.append(sender)
+    sig = blinker.Signal()
+    sig.connect(received)
+    sig.connect(received, weak=False)
+    del received
+    gc.collect()
+
+    sig.send()
+    assert sentinel == [None]
+
+    # strong, then weak: the strong reference is kept
+    def received(sender):
+        sentinel.append(sender)
+    sig = blinker.Signal()
+    sig.connect(received, weak=False)
+    sig.connect(received, sender='x')
+    del received
+    gc.collect()
+
+    assert len(sig.send('y')) == 1
+    assert sentinel == [None, 'y']
+    sig.send('x')
+    assert sentinel == [None, 'y', 'x']
+
+
 def test_instancemethod_receiver():
     sentinel = []
 
@@ -162,10 +212,27 @@ def test_filtered_receiver_weakref():
     # general index isn't cleaned up
     assert sig.receivers
     # but receiver/sender pairs are
-    values_are_empty_sets_(sig._by_receiver)
     values_are_empty_sets_(sig._by_sender)
 
 
+def test_weak_receiver_dies_during_send():
+    sentinel = []
+    def received(sender):
+        sentinel.append(sender)
+    holder = [received]
+    del received
+
+    def killer(sender):
+        del holder[:]
+
+    sig = blinker.Signal()
+    sig.connect(holder[0])
+    sig.connect(killer, weak=False)
+    assert sig.send() == [(killer, None)]
+    assert not sentinel
+    assert list(sig.receivers.values()) == [killer]
+
+
 def test_no_double_send():
     sentinel = []
     def received(sender):
@@ -185,6 +252,225 @@ def test_no_double_send():
     assert sentinel == [None, 123, None]
 
 
+def test_receiver_cache():
+    sentinel = []
+    def received(sender):
+        sentinel.append(sender)
+
+    sig = blinker.Signal()
+    sig.connect(received, weak=False)
+    for sender in range(1000, 1010):
+        sig.send(sender)
+    assert len(sentinel) == 10
+    # senders without specific receivers share one cache entry
+    assert len(sig._receiver_cache) == 1
+
+    sig.disconnect(received)
+    assert not sig._receiver_cache
+    sig.send(1000)
+    assert len(sentinel) == 10
+
+
+def test_disconnect_during_send():
+    sentinel = []
+    sig = blinker.Signal()
+    def a(sender):
+        sentinel.append('a')
+        sig.disconnect(b)
+    def b(sender):
+        sentinel.append('b')
+        sig.disconnect(a)
+    # whichever receiver runs first disconnects the other
+    for weak in True, False:
+        del sentinel[:]
+        sig.connect(a, weak=weak)
+        sig.connect(b, weak=weak)
+        assert len(sig.send()) == 1
+        assert len(sentinel) == 1
+        assert len(sig.receivers) == 1
+        sig.disconnect(a)
+        sig.disconnect(b)
+
+        del sentinel[:]
+        sig.connect(a, weak=weak)
+        sig.connect(b, weak=weak)
+        sig.send_nocollect()
+        assert len(sentinel) == 1
+        sig.disconnect(a)
+        sig.disconnect(b)
+
+
+def test_send_data():
+    sentinel = []
+    def received(sender, **kw):
+        sentinel.append(kw)
+    def fast_received(sender, data):
+        sentinel.append(data)
+    fast_received._blinker_fast = True
+
+    sig = blinker.Signal()
+    assert sig.send_data('abc', {'x': 1}) == []
+    sig.connect(received)
+    sig.connect(fast_received, 'abc')
+
+    data = {'x': 1}
+    results = sig.send_data('abc', data)
+    assert set(r for r, _ in results) == set([received, fast_received])
+    assert len(sentinel) == 2
+    assert [d for d in sentinel if d is data] == [data]
+    assert sentinel[0] == sentinel[1] == {'x': 1}
+
+    del sentinel[:]
+    assert sig.send_data() == [(received, None)]
+    assert sentinel == [{}]
+
+    def strong_fast(sender, data):
+        sentinel.append(data)
+    strong_fast._blinker_fast = True
+    sig.connect(strong_fast, weak=False)
+    del sentinel[:]
+    sig.send_data(None, data)
+    assert len(sentinel) == 2
+    assert [d for d in sentinel if d is data] == [data]
+
+    # only an attribute that is exactly True selects the fast convention
+    class Permissive(object):
+        def __getattr__(self, name):
+            if name == '_blinker_fast':
+                return 'yes'
+            raise AttributeError(name)
+        def __call__(self, sender, **kw):
+            sentinel.append(kw)
+    permissive = Permissive()
+    sig._clear_state()
+    sig.connect(permissive)
+    del sentinel[:]
+    sig.send_data(None, data)
+    assert sentinel == [{'x': 1}]
+    assert sentinel[0] is not data
+
+
+def test_send_nocollect():
+    sentinel = []
+    def received(sender, **kw):
+        sentinel.append((sender, kw))
+        return 'ignored'
+
+    sig = blinker.Signal()
+    assert sig.send_nocollect(123) is None
+    sig.connect(received)
+    sig.connect(received, 123)
+    assert sig.send_nocollect(123, x=1) is None
+    assert sentinel == [(123, {'x': 1})]
+    sig.send_nocollect()
+    assert sentinel == [(123, {'x': 1}), (None, {})]
+    assert_raises(TypeError, sig.send_nocollect, 1, 2)
+
+    del received
+    sig.send_nocollect()
+    assert len(sentinel) == 2
+    assert not sig.receivers
+
+
+def test_seal():
+    sentinel = []
+    def received(sender):
+        sentinel.append(sender)
+
+    sig = blinker.Signal()
+    sig.connect(received, weak=False)
+    sig.connect(received, 'xyz', weak=False)
+    sig.seal()
+
+    assert_raises(RuntimeError, sig.connect, lambda sender: None)
+    assert_raises(RuntimeError, sig.disconnect, received)
+    sig.send('xyz')
+    sig.send()
+    assert sentinel == ['xyz', None]
+
+    sig._clear_state()
+    assert not sig._sealed
+    assert sig.send() == []
+    sig.connect(received)
+    assert sig.send() == [(received, None)]
+    assert sentinel == ['xyz', None, None]
+
+
+def test_sealed_weak_receiver():
+    sentinel = []
+    def received(sender):
+        sentinel.append(sender)
+
+    sig = blinker.Signal()
+    sig.connect(received)
+    sig.seal()
+    del received
+    assert not sig.receivers
+    assert sig.send() == []
+
+
+def test_sealed_weak_sender():
+    sentinel = []
+    def received(sender):
+        sentinel.append(sender)
+
+    class Object(object):
+        pass
+    obj = Object()
+
+    sig = blinker.Signal()
+    sig.connect(received, obj)
+    sig.seal()
+    sig.send(obj)
+    assert sentinel == [obj]
+
+    del sentinel[:]
+    del obj
+    values_are_empty_sets_(sig._by_sender)
+    assert not sig._weak_senders
+    assert sig._specific_count == 0
+    assert not sig._receiver_cache
+    assert sig.send(Object()) == []
+
+
+def test_specific_sender_tracking():
+    sentinel = []
+    def received(sender):
+        sentinel.append(sender)
+    def other(sender):
+        pass
+
+    sig = blinker.Signal()
+    sig.connect(received, weak=False)
+    assert sig._specific_count == 0
+    sig.connect(received, 'xyz', weak=False)
+    sig.connect(other, 'xyz', weak=False)
+    sig.connect(received, 'abc', weak=False)
+    assert sig._specific_count == 2
+    sig.send('xyz')
+    sig.disconnect(received, 'xyz')
+    sig.disconnect(received, 'xyz')
+    assert sig._specific_count == 2
+    sig.disconnect(other)
+    assert sig._specific_count == 1
+    sig.disconnect(received, 'abc')
+    assert sig._specific_count == 0
+    sig.send('xyz')
+    assert sentinel == ['xyz', 'xyz']
+    sig.connect(other, 'xyz', weak=False)
+    assert sig._specific_count == 1
+
+    class Object(object):
+        pass
+    obj = Object()
+    sig.connect(received, obj)
+    assert sig._specific_count == 2
+    del obj
+    assert sig._specific_count == 1
+    sig._clear_state()
+    assert sig._specific_count == 0
+
+
 def test_has_receivers():
     received = lambda sender: None
 
@@ -217,6 +503,18 @@ def test_has_receivers():
     assert sig.has_receivers_for('xyz')
 
 
+def test_lookups_do_not_grow_index():
+    received = lambda sender: None
+
+    sig = blinker.Signal()
+    sig.connect(received, 'xyz', weak=False)
+    for sender in range(1000, 1010):
+        sig.has_receivers_for(sender)
+        sig.send(sender)
+        sig.disconnect(received, sender)
+    assert list(sig._by_sender.keys()) == [id('xyz')]
+
+
 def test_instance_doc():
     sig = blinker.Signal(doc='x')
     assert sig.__doc__ == 'x'
@@ -230,6 +528,31 @@ def test_named_blinker():
     assert 'squiznart' in repr(sig)
 
 
+def test_named_instance_doc():
+    sig = blinker.NamedSignal('squiznart', doc='x')
+    assert sig.__doc__ == 'x'
+    assert blinker.NamedSignal('squiznart').__doc__ == \
+        blinker.NamedSignal.__doc__
+    assert 'named' in blinker.NamedSignal.__doc__
+
+    class Subclass(blinker.Signal):
+        """Subclass doc."""
+    assert Subclass().__doc__ == 'Subclass doc.'
+    assert Subclass(doc='y').__doc__ == 'y'
+
+    class SlottedSubclass(blinker.Signal):
+        __slots__ = ()
+    assert SlottedSubclass().__doc__ is None
+    assert SlottedSubclass(doc='z')._doc == 'z'
+
+    class DocumentedSlottedSubclass(blinker.NamedSignal):
+        __doc__ = instance_doc("""Slotted doc.""")
+        __slots__ = ('extra',)
+    assert DocumentedSlottedSubclass('n').__doc__ == 'Slotted doc.'
+    assert DocumentedSlottedSubclass('n', doc='w').__doc__ == 'w'
+    assert DocumentedSlottedSubclass.__doc__ == 'Slotted doc.'
+
+
 def values_are_empty_sets_(dictionary):
     for val in dictionary.values():
         assert val == set()